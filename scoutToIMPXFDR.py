@@ -6,7 +6,10 @@
 # micha.birklbauer@gmail.com
 
 import argparse
+import os
+import numpy as np
 import pandas as pd
+import xlsxwriter
 import traceback as tb
 
 __version = "1.0.0"
@@ -62,37 +65,62 @@ optional arguments:
 # Modifications B: (string)                                -> create with xl name and modification
 # Confidence: (string selection) High | Medium | Low       -> create with High
 
-# function that returns pandas dataframe in annika format
-def create_annika_result(scout_filename: str, crosslinker: str = "DSSO", crosslinker_aa: str = "K") -> pd.DataFrame:
+# function that reads the Scout columns that are mapped to MS Annika columns
+# returns an iterator of dataframes if a chunksize is given
+def read_scout_result(scout_filename: str, chunksize: int = None):
 
-    if len(crosslinker_aa) != 1:
-        raise Exception("Crosslinker modifications that affect more than one amino acid are not supported! Exiting...")
+    # only the columns that are mapped to MS Annika columns are parsed
+    scout_columns = ["Link-Type",
+                     "CSM count",
+                     "Alpha peptide",
+                     "Alpha protein mapping(s)",
+                     "Alpha peptide position",
+                     "Beta peptide",
+                     "Beta protein mapping(s)",
+                     "Beta peptide position",
+                     "Score"]
+    scout_dtypes = {"CSM count": "int32",
+                    "Alpha peptide position": "int32",
+                    "Beta peptide position": "int32",
+                    "Score": "float64"}
 
-    # load file
-    scout_df = pd.read_csv(scout_filename)
-    nrows = scout_df.shape[0]
+    return pd.read_csv(scout_filename, usecols = scout_columns, dtype = scout_dtypes, engine = "c", chunksize = chunksize)
+
+# function that maps a (chunk of a) Scout result dataframe to MS Annika format
+def scout_to_annika(scout_df: pd.DataFrame, crosslinker: str = "DSSO", crosslinker_aa: str = "K") -> pd.DataFrame:
+
+    # modification suffix is shared by both peptides, e.g. (DSSO)
+    modification_suffix = "(" + crosslinker + ")"
 
     # columns
-    Checked = ["FALSE" for i in range(nrows)]
-    Crosslinker = [crosslinker for i in range(nrows)]
-    Crosslink_Type = scout_df["Link-Type"].apply(lambda x: "Intra" if "intra" in x.lower() else "Inter").tolist()
-    CSMs = scout_df["CSM count"].tolist()
-    Proteins = [0 for i in range(nrows)]
-    Sequence_A = scout_df["Alpha peptide"].apply(lambda x: x.replace(" ", "")).tolist()
-    Accession_A = scout_df["Alpha protein mapping(s)"].tolist()
-    Position_A = scout_df["Alpha peptide position"].tolist()
-    Sequence_B = scout_df["Beta peptide"].apply(lambda x: x.replace(" ", "")).tolist()
-    Accession_B = scout_df["Beta protein mapping(s)"].tolist()
-    Position_B = scout_df["Beta peptide position"].tolist()
-    Protein_Descriptions_A = scout_df["Alpha protein mapping(s)"].tolist()
-    Protein_Descriptions_B = scout_df["Beta protein mapping(s)"].tolist()
-    Best_CSM_Score = scout_df["Score"].tolist()
-    In_protein_A = [0 for i in range(nrows)]
-    In_protein_B = [0 for i in range(nrows)]
-    Decoy = ["FALSE" for i in range(nrows)]
-    Modifications_A = scout_df["Alpha peptide position"].apply(lambda x: crosslinker_aa + str(x) + "(" + crosslinker + ")").tolist()
-    Modifications_B = scout_df["Beta peptide position"].apply(lambda x: crosslinker_aa + str(x) + "(" + crosslinker + ")").tolist()
-    Confidence = ["High" for i in range(nrows)]
+    # Scout only reports a handful of distinct link types, so each distinct value is classified once
+    # missing link types (code -1) are mapped to the trailing "Inter"
+    link_type_codes, link_types = pd.factorize(scout_df["Link-Type"])
+    link_type_classes = ["Intra" if "intra" in link_type.lower() else "Inter" for link_type in link_types]
+    link_type_classes = np.array(link_type_classes + ["Inter"])
+    Crosslink_Type = link_type_classes[link_type_codes]
+    CSMs = scout_df["CSM count"]
+    Sequence_A = scout_df["Alpha peptide"].str.replace(" ", "", regex = False)
+    Accession_A = scout_df["Alpha protein mapping(s)"]
+    Position_A = scout_df["Alpha peptide position"]
+    Sequence_B = scout_df["Beta peptide"].str.replace(" ", "", regex = False)
+    Accession_B = scout_df["Beta protein mapping(s)"]
+    Position_B = scout_df["Beta peptide position"]
+    Protein_Descriptions_A = Accession_A
+    Protein_Descriptions_B = Accession_B
+    Best_CSM_Score = scout_df["Score"]
+    Modifications_A = crosslinker_aa + Position_A.astype(str) + modification_suffix
+    Modifications_B = crosslinker_aa + Position_B.astype(str) + modification_suffix
+
+    # constant columns are preallocated with explicit dtypes to skip dtype inference
+    nrows = scout_df.shape[0]
+    Checked = np.full(nrows, "FALSE", dtype = object)
+    Crosslinker = np.full(nrows, crosslinker, dtype = object)
+    Proteins = np.zeros(nrows, dtype = np.int32)
+    In_protein_A = np.zeros(nrows, dtype = np.int32)
+    In_protein_B = np.zeros(nrows, dtype = np.int32)
+    Decoy = np.full(nrows, "FALSE", dtype = object)
+    Confidence = np.full(nrows, "High", dtype = object)
 
     # create annika dataframe
     annika_df = pd.DataFrame({"Checked": Checked,
@@ -114,12 +142,72 @@ def create_annika_result(scout_filename: str, crosslinker: str = "DSSO", crossli
                               "Decoy": Decoy,
                               "Modifications A": Modifications_A,
                               "Modifications B": Modifications_B,
-                              "Confidence": Confidence})
+                              "Confidence": Confidence},
+                             index = scout_df.index)
 
     return annika_df
 
+# function that returns pandas dataframe in annika format
+def create_annika_result(scout_filename: str, crosslinker: str = "DSSO", crosslinker_aa: str = "K") -> pd.DataFrame:
+
+    if len(crosslinker_aa) != 1:
+        raise Exception("Crosslinker modifications that affect more than one amino acid are not supported! Exiting...")
+
+    return scout_to_annika(read_scout_result(scout_filename), crosslinker, crosslinker_aa)
+
+# function that streams a Scout result file to an MS Annika result file (in xlsx format)
+# only one chunk of the Scout result is held in memory at a time
+# returns the number of written crosslinks
+def write_annika_result(scout_filename: str, output_file: str, crosslinker: str = "DSSO", crosslinker_aa: str = "K", chunksize: int = 50000) -> int:
+
+    if len(crosslinker_aa) != 1:
+        raise Exception("Crosslinker modifications that affect more than one amino acid are not supported! Exiting...")
+
+    # constant_memory flushes every row to disk once the next row is started
+    # strings are always written as plain strings, never as numbers, formulas or urls
+    workbook = xlsxwriter.Workbook(output_file, {"constant_memory": True,
+                                                 "strings_to_numbers": False,
+                                                 "strings_to_formulas": False,
+                                                 "strings_to_urls": False})
+    worksheet = workbook.add_worksheet("Crosslinks")
+    header_format = workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+
+    row_idx = 0
+    for scout_chunk in read_scout_result(scout_filename, chunksize):
+        annika_chunk = scout_to_annika(scout_chunk, crosslinker, crosslinker_aa)
+        if row_idx == 0:
+            worksheet.write_row(row_idx, 0, annika_chunk.columns.tolist(), header_format)
+            row_idx += 1
+        # every column is written with its type specific xlsxwriter method instead of the per cell
+        # type dispatch of write_row, columns with missing values fall back to write for empty cells
+        writers = []
+        for column in annika_chunk.columns:
+            if annika_chunk[column].hasnans:
+                writers.append(worksheet.write)
+            elif pd.api.types.is_numeric_dtype(annika_chunk[column]):
+                writers.append(worksheet.write_number)
+            else:
+                writers.append(worksheet.write_string)
+        annika_chunk = annika_chunk.astype(object).where(annika_chunk.notna(), None)
+        for row in annika_chunk.itertuples(index = False, name = None):
+            for col_idx, value in enumerate(row):
+                writers[col_idx](row_idx, col_idx, value)
+            row_idx += 1
+
+    workbook.close()
+
+    return max(row_idx - 1, 0)
+
+# function that appends the xlsx extension to a filename if it does not have it already
+def xlsx_filename(filename: str) -> str:
+
+    if os.path.splitext(filename)[1].lower() == ".xlsx":
+        return filename
+
+    return filename + ".xlsx"
+
 # read Scout result and write MS Annika result (in xlsx format)
-def main() -> pd.DataFrame:
+def main() -> int:
 
     parser = argparse.ArgumentParser()
     parser.add_argument(metavar = "f",
@@ -147,20 +235,22 @@ def main() -> pd.DataFrame:
                         version = __version)
     args = parser.parse_args()
 
+    if len(args.crosslinker_modification) != 1:
+        parser.error("Crosslinker modifications that affect more than one amino acid are not supported!")
+
     input_file = args.files[0]
-    output_file = args.files[0].split(".csv")[0] + ".xlsx"
+    output_file = os.path.splitext(input_file)[0] + ".xlsx"
 
     if len(args.files) > 1:
-        output_file = args.files[1].split(".xlsx")[0] + ".xlsx"
+        output_file = xlsx_filename(args.files[1])
 
     if args.output is not None:
-        output_file = args.output.split(".xlsx")[0] + ".xlsx"
+        output_file = xlsx_filename(args.output)
 
-    scout_resultdf = create_annika_result(input_file, args.crosslinker, args.crosslinker_modification)
-    scout_resultdf.to_excel(output_file, sheet_name = "Crosslinks", index = False, engine = "xlsxwriter")
+    nr_crosslinks = write_annika_result(input_file, output_file, args.crosslinker, args.crosslinker_modification)
 
-    return scout_resultdf
+    return nr_crosslinks
 
 if __name__ == "__main__":
 
-    scout_df = main()
+    nr_crosslinks = main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+# Scout Result file to MS Annika Result file converter - tests
+# 2022 (c) Micha Johannes Birklbauer
+# https://github.com/michabirklbauer/
+# micha.birklbauer@gmail.com
+
+import os
+import math
+import openpyxl
+from scoutToIMPXFDR import create_annika_result, write_annika_result
+
+# Scout result with short rows:
+# the second crosslink is missing its (unmapped) trailing field
+# the third crosslink is missing its score and trailing field, which are padded with missing values
+# the fourth crosslink has an empty beta protein mapping
+SCOUT_RESULT = """Link-Type,CSM count,Alpha peptide,Alpha protein mapping(s),Alpha peptide position,Beta peptide,Beta protein mapping(s),Beta peptide position,Score,Comment
+Intra-link,2,A K S R,P0A7X3,2,M K L,P0A7X3,2,55.5,
+Inter-link,1,K T A R,P0A7X3,1,L K M,P0A6F5,2,42.1
+Inter-link,3,S K A R,P0A6F5,2,K L M,P0A7X3,1
+Intra-link,1,A A K R,P0A6F5,3,K M L,,1,7.25,
+"""
+
+def write_scout_result(tmp_path) -> str:
+
+    scout_filename = os.path.join(str(tmp_path), "scout_result.csv")
+    with open(scout_filename, "w") as f:
+        f.write(SCOUT_RESULT)
+
+    return scout_filename
+
+def test_create_annika_result_short_rows(tmp_path):
+
+    annika_df = create_annika_result(write_scout_result(tmp_path))
+
+    assert annika_df.shape == (4, 20)
+    assert annika_df["Crosslink Type"].tolist() == ["Intra", "Inter", "Inter", "Intra"]
+    assert annika_df["Sequence B"].tolist() == ["MKL", "LKM", "KLM", "KML"]
+    assert annika_df["Modifications A"].tolist() == ["K2(DSSO)", "K1(DSSO)", "K2(DSSO)", "K3(DSSO)"]
+    assert math.isnan(annika_df["Best CSM Score"].iloc[2])
+
+def test_create_annika_result_int32_columns(tmp_path):
+
+    annika_df = create_annika_result(write_scout_result(tmp_path))
+
+    for column in ["# CSMs", "# Proteins", "Position A", "Position B", "In protein A", "In protein B"]:
+        assert annika_df[column].dtype == "int32"
+
+def test_write_annika_result_short_rows(tmp_path):
+
+    output_file = os.path.join(str(tmp_path), "annika_result.xlsx")
+
+    assert write_annika_result(write_scout_result(tmp_path), output_file, chunksize = 2) == 4
+
+    worksheet = openpyxl.load_workbook(output_file)["Crosslinks"]
+    rows = [[cell.value for cell in row] for row in worksheet.iter_rows()]
+    header = rows[0]
+
+    assert len(rows) == 5
+    assert header == ["Checked", "Crosslinker", "Crosslink Type", "# CSMs", "# Proteins",
+                      "Sequence A", "Accession A", "Position A", "Sequence B", "Accession B", "Position B",
+                      "Protein Descriptions A", "Protein Descriptions B", "Best CSM Score",
+                      "In protein A", "In protein B", "Decoy", "Modifications A", "Modifications B", "Confidence"]
+    assert rows[1] == ["FALSE", "DSSO", "Intra", 2, 0, "AKSR", "P0A7X3", 2, "MKL", "P0A7X3", 2,
+                       "P0A7X3", "P0A7X3", 55.5, 0, 0, "FALSE", "K2(DSSO)", "K2(DSSO)", "High"]
+    assert rows[2][header.index("Best CSM Score")] == 42.1
+    # padded score of the short row and empty protein mapping are written as empty cells
+    assert rows[3][header.index("Best CSM Score")] is None
+    assert rows[3][header.index("Sequence B")] == "KLM"
+    assert rows[4][header.index("Accession B")] is None
+    assert rows[4][header.index("Protein Descriptions B")] is None
+    assert rows[4][header.index("Best CSM Score")] == 7.25